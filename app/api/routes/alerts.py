@@ -1,20 +1,46 @@
 # app/api/routes/alerts.py - Complete alerts routes
 from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi.responses import ORJSONResponse
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import select, bindparam
+from sqlalchemy.orm import Session, joinedload
 from typing import Optional, List
 from datetime import datetime
-import json
 import logging
+import orjson
 
 from app.database.db import get_db
 from app.services.alert_service import AlertService
 from app.models.employee import Employee
-from app.models.alert import Alert, AlertType, AlertStatus, AlertPriority
+from app.models.alert import Alert, AlertType, AlertStatus, AlertPriority, alert_row_to_dict
 from app.models.alert_history import AlertHistory
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# Top-level keys every uploaded shelf-detection JSON must carry
+REQUIRED_ALERT_FIELDS = ("shelf_number", "empty_percentage", "items_detected")
+
+# Column-only history projection, newest first; built once and reused per request
+ALERT_HISTORY_QUERY = (
+    select(
+        AlertHistory.id,
+        AlertHistory.action,
+        AlertHistory.performed_by,
+        AlertHistory.notes,
+        AlertHistory.timestamp
+    )
+    .where(AlertHistory.alert_id == bindparam("alert_id"))
+    .order_by(AlertHistory.timestamp.desc())
+)
+RECENT_ALERT_HISTORY_QUERY = ALERT_HISTORY_QUERY.limit(5)
+
+def _employee_exists(db: Session, employee_id: str) -> bool:
+    """Check an employee exists with SELECT EXISTS, without loading the row"""
+    return db.query(
+        db.query(Employee).filter(Employee.employee_id == employee_id).exists()
+    ).scalar()
+
 @router.post("/process")
 async def process_alerts(
     file: UploadFile = File(...), 
@@ -29,9 +55,8 @@ async def process_alerts(
         
         # Read and parse JSON data
         try:
-            content = await file.read()
-            data = json.loads(content)
-        except json.JSONDecodeError as e:
+            data = orjson.loads(await file.read())
+        except orjson.JSONDecodeError as e:
             logger.error(f"Invalid JSON format: {str(e)}")
             raise HTTPException(status_code=400, detail=f"Invalid JSON format: {str(e)}")
         except Exception as e:
@@ -39,8 +64,7 @@ async def process_alerts(
             raise HTTPException(status_code=400, detail=f"Error reading file: {str(e)}")
         
         # Validate JSON structure for new format
-        required_fields = ["shelf_number", "empty_percentage", "items_detected"]
-        for field in required_fields:
+        for field in REQUIRED_ALERT_FIELDS:
             if field not in data:
                 raise HTTPException(status_code=400, detail=f"Missing required field: {field}")
         
@@ -54,9 +78,9 @@ async def process_alerts(
         if not isinstance(data["items_detected"], list):
             raise HTTPException(status_code=400, detail="items_detected must be an array")
         
-        # Process alerts using AlertService
+        # Process alerts using AlertService (blocking DB work, keep it off the event loop)
         alert_service = AlertService(db)
-        result = alert_service.process_json_data(data)
+        result = await run_in_threadpool(alert_service.process_json_data, data)
         
         if not result["success"]:
             logger.error(f"Alert processing failed: {result['error']}")
@@ -84,7 +108,7 @@ async def process_alerts(
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 @router.get("/active")
-async def get_active_alerts(
+def get_active_alerts(
     employee_id: Optional[str] = Query(None, description="Filter alerts by employee ID"),
     priority: Optional[str] = Query(None, description="Filter by priority (LOW, MEDIUM, HIGH, CRITICAL)"),
     alert_type: Optional[str] = Query(None, description="Filter by alert type"),
@@ -97,36 +121,35 @@ async def get_active_alerts(
     try:
         alert_service = AlertService(db)
         
-        # Get base active alerts
-        alerts = alert_service.get_active_alerts(employee_id)
-        
-        # Apply additional filters
+        # Validate filters up front; filtering and the limit are applied in SQL
+        priority_enum = None
         if priority:
             try:
                 priority_enum = AlertPriority(priority.upper())
-                alerts = [alert for alert in alerts if alert.priority == priority_enum]
             except ValueError:
                 raise HTTPException(status_code=400, detail=f"Invalid priority: {priority}")
         
+        type_enum = None
         if alert_type:
             try:
                 type_enum = AlertType(alert_type.upper())
-                alerts = [alert for alert in alerts if alert.alert_type == type_enum]
             except ValueError:
                 raise HTTPException(status_code=400, detail=f"Invalid alert type: {alert_type}")
         
-        if shelf_name:
-            alerts = [alert for alert in alerts if alert.shelf_name == shelf_name]
-        
-        # Apply limit
-        alerts = alerts[:limit]
+        alerts = alert_service.get_active_alerts(
+            employee_id,
+            priority=priority_enum,
+            alert_type=type_enum,
+            shelf_name=shelf_name,
+            limit=limit
+        )
         
-        return {
+        return ORJSONResponse(content={
             "success": True,
-            "alerts": [alert.to_dict() for alert in alerts],
+            "alerts": [alert_row_to_dict(alert) for alert in alerts],
             "count": len(alerts),
-            "total_active": len(alert_service.get_active_alerts())
-        }
+            "total_active": alert_service.count_active_alerts()
+        })
         
     except HTTPException:
         raise
@@ -135,7 +158,7 @@ async def get_active_alerts(
         raise HTTPException(status_code=500, detail=f"Error fetching alerts: {str(e)}")
 
 @router.get("/dashboard/{employee_id}")
-async def get_dashboard_alerts(
+def get_dashboard_alerts(
     employee_id: str,
     db: Session = Depends(get_db)
 ):
@@ -148,20 +171,20 @@ async def get_dashboard_alerts(
             raise HTTPException(status_code=404, detail="Employee not found")
         
         alert_service = AlertService(db)
-        alerts = alert_service.get_active_alerts(employee_id)
+        alerts = alert_service.get_active_alerts(employee_id, employee=employee)
         statistics = alert_service.get_alert_statistics()
         
-        return {
+        return ORJSONResponse(content={
             "success": True,
             "employee": {
                 "employee_id": employee.employee_id,
                 "username": employee.username,
                 "role": employee.role
             },
-            "alerts": [alert.to_dict() for alert in alerts],
+            "alerts": [alert_row_to_dict(alert) for alert in alerts],
             "statistics": statistics,
             "count": len(alerts)
-        }
+        })
         
     except HTTPException:
         raise
@@ -170,7 +193,7 @@ async def get_dashboard_alerts(
         raise HTTPException(status_code=500, detail=f"Error fetching dashboard alerts: {str(e)}")
 
 @router.post("/acknowledge/{alert_id}")
-async def acknowledge_alert(
+def acknowledge_alert(
     alert_id: int,
     employee_id: str,
     db: Session = Depends(get_db)
@@ -179,8 +202,7 @@ async def acknowledge_alert(
     
     try:
         # Validate employee exists
-        employee = db.query(Employee).filter(Employee.employee_id == employee_id).first()
-        if not employee:
+        if not _employee_exists(db, employee_id):
             raise HTTPException(status_code=404, detail="Employee not found")
         
         alert_service = AlertService(db)
@@ -201,7 +223,7 @@ async def acknowledge_alert(
         raise HTTPException(status_code=500, detail=f"Error acknowledging alert: {str(e)}")
 
 @router.post("/resolve/{alert_id}")
-async def resolve_alert(
+def resolve_alert(
     alert_id: int,
     employee_id: str,
     db: Session = Depends(get_db)
@@ -210,8 +232,7 @@ async def resolve_alert(
     
     try:
         # Validate employee exists
-        employee = db.query(Employee).filter(Employee.employee_id == employee_id).first()
-        if not employee:
+        if not _employee_exists(db, employee_id):
             raise HTTPException(status_code=404, detail="Employee not found")
         
         alert_service = AlertService(db)
@@ -232,7 +253,7 @@ async def resolve_alert(
         raise HTTPException(status_code=500, detail=f"Error resolving alert: {str(e)}")
 
 @router.get("/history/{alert_id}")
-async def get_alert_history(
+def get_alert_history(
     alert_id: int,
     db: Session = Depends(get_db)
 ):
@@ -245,26 +266,26 @@ async def get_alert_history(
             raise HTTPException(status_code=404, detail="Alert not found")
         
         # Get alert history
-        history = db.query(AlertHistory).filter(
-            AlertHistory.alert_id == alert_id
-        ).order_by(AlertHistory.timestamp.desc()).all()
-        
-        history_data = []
-        for record in history:
-            history_data.append({
-                "id": record.id,
-                "action": record.action,
-                "performed_by": record.performed_by,
-                "notes": record.notes,
-                "timestamp": record.timestamp.isoformat() if record.timestamp else None
-            })
-        
-        return {
+        history = db.execute(ALERT_HISTORY_QUERY, {"alert_id": alert_id}).all()
+        
+        # Timestamps stay datetimes; ORJSONResponse renders them as ISO strings
+        history_data = [
+            {
+                "id": record_id,
+                "action": action,
+                "performed_by": performed_by,
+                "notes": notes,
+                "timestamp": timestamp
+            }
+            for record_id, action, performed_by, notes, timestamp in history
+        ]
+        
+        return ORJSONResponse(content={
             "success": True,
             "alert": alert.to_dict(),
             "history": history_data,
             "count": len(history_data)
-        }
+        })
         
     except HTTPException:
         raise
@@ -273,25 +294,15 @@ async def get_alert_history(
         raise HTTPException(status_code=500, detail=f"Error fetching alert history: {str(e)}")
 
 @router.get("/statistics")
-async def get_alert_statistics(
+def get_alert_statistics(
     db: Session = Depends(get_db)
 ):
     """Get comprehensive alert statistics"""
     
     try:
         alert_service = AlertService(db)
-        statistics = alert_service.get_alert_statistics()
-        
-        # Add additional statistics
-        total_alerts = db.query(Alert).count()
-        resolved_alerts = db.query(Alert).filter(Alert.status == AlertStatus.RESOLVED).count()
-        acknowledged_alerts = db.query(Alert).filter(Alert.status == AlertStatus.ACKNOWLEDGED).count()
-        
-        statistics.update({
-            "total_alerts": total_alerts,
-            "resolved_alerts": resolved_alerts,
-            "acknowledged_alerts": acknowledged_alerts
-        })
+        # Active-alert breakdown plus overall status totals, from one query
+        statistics = alert_service.get_alert_statistics(include_totals=True)
         
         return {
             "success": True,
@@ -303,7 +314,7 @@ async def get_alert_statistics(
         raise HTTPException(status_code=500, detail=f"Error fetching statistics: {str(e)}")
 
 @router.get("/")
-async def get_all_alerts(
+def get_all_alerts(
     status: Optional[str] = Query(None, description="Filter by status (ACTIVE, ACKNOWLEDGED, RESOLVED, PENDING)"),
     priority: Optional[str] = Query(None, description="Filter by priority (LOW, MEDIUM, HIGH, CRITICAL)"),
     alert_type: Optional[str] = Query(None, description="Filter by alert type"),
@@ -353,14 +364,14 @@ async def get_all_alerts(
         # Apply pagination and ordering
         alerts = query.order_by(Alert.created_at.desc()).offset(offset).limit(limit).all()
         
-        return {
+        return ORJSONResponse(content={
             "success": True,
-            "alerts": [alert.to_dict() for alert in alerts],
+            "alerts": [alert_row_to_dict(alert) for alert in alerts],
             "count": len(alerts),
             "total_count": total_count,
             "offset": offset,
             "limit": limit
-        }
+        })
         
     except HTTPException:
         raise
@@ -369,21 +380,23 @@ async def get_all_alerts(
         raise HTTPException(status_code=500, detail=f"Error fetching alerts: {str(e)}")
 
 @router.get("/{alert_id}")
-async def get_alert_details(
+def get_alert_details(
     alert_id: int,
     db: Session = Depends(get_db)
 ):
     """Get detailed information about a specific alert"""
     
     try:
-        alert = db.query(Alert).filter(Alert.id == alert_id).first()
+        alert = db.query(Alert).options(
+            joinedload(Alert.assigned_staff)
+        ).filter(Alert.id == alert_id).first()
         if not alert:
             raise HTTPException(status_code=404, detail="Alert not found")
         
-        # Get assigned employee info if available
+        # Get assigned employee info if available (loaded with the alert)
         assigned_employee = None
         if alert.assigned_staff_id:
-            employee = db.query(Employee).filter(Employee.employee_id == alert.assigned_staff_id).first()
+            employee = alert.assigned_staff
             if employee:
                 assigned_employee = {
                     "employee_id": employee.employee_id,
@@ -392,27 +405,27 @@ async def get_alert_details(
                 }
         
         # Get recent history (last 5 actions)
-        recent_history = db.query(AlertHistory).filter(
-            AlertHistory.alert_id == alert_id
-        ).order_by(AlertHistory.timestamp.desc()).limit(5).all()
-        
-        history_data = []
-        for record in recent_history:
-            history_data.append({
-                "action": record.action,
-                "performed_by": record.performed_by,
-                "notes": record.notes,
-                "timestamp": record.timestamp.isoformat() if record.timestamp else None
-            })
+        recent_history = db.execute(RECENT_ALERT_HISTORY_QUERY, {"alert_id": alert_id}).all()
+        
+        # Timestamps stay datetimes, as in get_alert_history
+        history_data = [
+            {
+                "action": action,
+                "performed_by": performed_by,
+                "notes": notes,
+                "timestamp": timestamp
+            }
+            for _, action, performed_by, notes, timestamp in recent_history
+        ]
         
         alert_data = alert.to_dict()
         alert_data["assigned_employee"] = assigned_employee
         alert_data["recent_history"] = history_data
         
-        return {
+        return ORJSONResponse(content={
             "success": True,
             "alert": alert_data
-        }
+        })
         
     except HTTPException:
         raise
@@ -421,7 +434,7 @@ async def get_alert_details(
         raise HTTPException(status_code=500, detail=f"Error fetching alert details: {str(e)}")
 
 @router.post("/bulk-acknowledge")
-async def bulk_acknowledge_alerts(
+def bulk_acknowledge_alerts(
     alert_ids: List[int],
     employee_id: str,
     db: Session = Depends(get_db)
@@ -430,26 +443,23 @@ async def bulk_acknowledge_alerts(
     
     try:
         # Validate employee exists
-        employee = db.query(Employee).filter(Employee.employee_id == employee_id).first()
-        if not employee:
+        if not _employee_exists(db, employee_id):
             raise HTTPException(status_code=404, detail="Employee not found")
         
         if not alert_ids:
             raise HTTPException(status_code=400, detail="No alert IDs provided")
         
         alert_service = AlertService(db)
+        acknowledged_ids = set(alert_service.acknowledge_alerts(alert_ids, employee_id))
         successful_count = 0
         failed_alerts = []
         
+        # A repeated id only counts once, as it is already acknowledged the second time
         for alert_id in alert_ids:
-            try:
-                success = alert_service.acknowledge_alert(alert_id, employee_id)
-                if success:
-                    successful_count += 1
-                else:
-                    failed_alerts.append(alert_id)
-            except Exception as e:
-                logger.error(f"Error acknowledging alert {alert_id}: {str(e)}")
+            if alert_id in acknowledged_ids:
+                acknowledged_ids.discard(alert_id)
+                successful_count += 1
+            else:
                 failed_alerts.append(alert_id)
         
         return {
@@ -467,7 +477,7 @@ async def bulk_acknowledge_alerts(
         raise HTTPException(status_code=500, detail=f"Error in bulk acknowledge: {str(e)}")
 
 @router.post("/bulk-resolve")
-async def bulk_resolve_alerts(
+def bulk_resolve_alerts(
     alert_ids: List[int],
     employee_id: str,
     db: Session = Depends(get_db)
@@ -476,26 +486,23 @@ async def bulk_resolve_alerts(
     
     try:
         # Validate employee exists
-        employee = db.query(Employee).filter(Employee.employee_id == employee_id).first()
-        if not employee:
+        if not _employee_exists(db, employee_id):
             raise HTTPException(status_code=404, detail="Employee not found")
         
         if not alert_ids:
             raise HTTPException(status_code=400, detail="No alert IDs provided")
         
         alert_service = AlertService(db)
+        resolved_ids = set(alert_service.resolve_alerts(alert_ids, employee_id))
         successful_count = 0
         failed_alerts = []
         
+        # A repeated id only counts once, as it is already resolved the second time
         for alert_id in alert_ids:
-            try:
-                success = alert_service.resolve_alert(alert_id, employee_id)
-                if success:
-                    successful_count += 1
-                else:
-                    failed_alerts.append(alert_id)
-            except Exception as e:
-                logger.error(f"Error resolving alert {alert_id}: {str(e)}")
+            if alert_id in resolved_ids:
+                resolved_ids.discard(alert_id)
+                successful_count += 1
+            else:
                 failed_alerts.append(alert_id)
         
         return {
@@ -513,7 +520,7 @@ async def bulk_resolve_alerts(
         raise HTTPException(status_code=500, detail=f"Error in bulk resolve: {str(e)}")
 
 @router.get("/shelf/{shelf_name}")
-async def get_shelf_alerts(
+def get_shelf_alerts(
     shelf_name: str,
     status: Optional[str] = Query(None, description="Filter by status"),
     db: Session = Depends(get_db)
@@ -532,12 +539,12 @@ async def get_shelf_alerts(
         
         alerts = query.order_by(Alert.created_at.desc()).all()
         
-        return {
+        return ORJSONResponse(content={
             "success": True,
             "shelf_name": shelf_name,
-            "alerts": [alert.to_dict() for alert in alerts],
+            "alerts": [alert_row_to_dict(alert) for alert in alerts],
             "count": len(alerts)
-        }
+        })
         
     except HTTPException:
         raise
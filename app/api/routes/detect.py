@@ -3,7 +3,7 @@ from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
 from sqlalchemy.orm import Session
 from pathlib import Path
 import shutil
-import json
+import orjson
 import logging
 
 from app.database.db import get_db
@@ -17,7 +17,7 @@ UPLOAD_DIR = Path("static/uploads")
 OUTPUT_JSON = Path("static/outputs/output.json")
 
 @router.post("/detect/")
-async def detect_and_alert(
+def detect_and_alert(
     file: UploadFile = File(...),
     shelf_number: str = "A1",
     db: Session = Depends(get_db)
@@ -35,8 +35,7 @@ async def detect_and_alert(
         if not OUTPUT_JSON.exists():
             raise HTTPException(status_code=500, detail="output.json not found")
 
-        with open(OUTPUT_JSON, "r") as f:
-            data = json.load(f)
+        data = orjson.loads(OUTPUT_JSON.read_bytes())
 
         alert_service = AlertService(db)
         result = alert_service.process_json_data(data)
@@ -1,6 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from app.database.db import get_db
 from app.models.inventory import Inventory
 from app.models.employee import Employee
@@ -8,9 +8,30 @@ from app.models.shelf import Shelf
 from app.schemas.inventory import InventoryCreate, InventoryUpdate, InventoryResponse, CategoryEnum, ShelfSlotsResponse
 from app.deps.roles import require_store_manager
 from sqlalchemy.exc import IntegrityError
+import orjson
 
 router = APIRouter(prefix="/inventory", tags=["inventory"])
 
+# CategoryEnum is fixed at runtime, so the categories response is encoded once
+_CATEGORIES_JSON = orjson.dumps([category.value for category in CategoryEnum])
+
+def _rack_occupied(db: Session, shelf_name: str, rack_name: str, exclude_id: Optional[int] = None) -> bool:
+    """Check whether a rack on a shelf already holds an item, with SELECT EXISTS"""
+    query = db.query(Inventory).filter(
+        Inventory.shelf_name == shelf_name,
+        Inventory.rack_name == rack_name
+    )
+    if exclude_id is not None:
+        query = query.filter(Inventory.id != exclude_id)
+    return db.query(query.exists()).scalar()
+
+def _rack_occupied_error(shelf_name: str, rack_name: str) -> HTTPException:
+    """400 for a rack that already holds another item"""
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=f"Rack '{rack_name}' is already occupied on shelf '{shelf_name}'"
+    )
+
 @router.post("/", response_model=InventoryResponse, status_code=status.HTTP_201_CREATED)
 def create_inventory_item(
     inventory_data: InventoryCreate,
@@ -42,16 +63,8 @@ def create_inventory_item(
         )
     
     # Check if rack is already occupied on this shelf
-    existing_rack = db.query(Inventory).filter(
-        Inventory.shelf_name == inventory_data.shelf_name,
-        Inventory.rack_name == inventory_data.rack_name
-    ).first()
-    
-    if existing_rack:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Rack '{inventory_data.rack_name}' is already occupied on shelf '{inventory_data.shelf_name}'"
-        )
+    if _rack_occupied(db, inventory_data.shelf_name, inventory_data.rack_name):
+        raise _rack_occupied_error(inventory_data.shelf_name, inventory_data.rack_name)
     
     try:
         db_inventory = Inventory(
@@ -67,6 +80,9 @@ def create_inventory_item(
         return db_inventory
     except IntegrityError:
         db.rollback()
+        # The unique shelf/rack index catches a rack taken since the check above
+        if _rack_occupied(db, inventory_data.shelf_name, inventory_data.rack_name):
+            raise _rack_occupied_error(inventory_data.shelf_name, inventory_data.rack_name)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Product number already exists"
@@ -113,8 +129,9 @@ def get_shelf_slots(
         )
     
     # Get occupied racks
-    occupied_items = db.query(Inventory).filter(Inventory.shelf_name == shelf_name).all()
-    occupied_racks = [item.rack_name for item in occupied_items]
+    occupied_racks = [
+        rack_name for rack_name, in db.query(Inventory.rack_name).filter(Inventory.shelf_name == shelf_name)
+    ]
     
     return ShelfSlotsResponse(
         shelf_name=shelf_name,
@@ -139,7 +156,8 @@ def update_inventory_item(
             detail="Inventory item not found"
         )
     
-    update_data = inventory_data.model_dump(exclude_unset=True)
+    # mode="json" hands back CategoryEnum as its plain str value
+    update_data = inventory_data.model_dump(exclude_unset=True, mode="json")
     
     # If updating shelf_name, check if new shelf exists and is active
     if 'shelf_name' in update_data:
@@ -155,23 +173,16 @@ def update_inventory_item(
                 detail="Cannot move item to inactive shelf"
             )
     
+    # Where the item ends up; plain values, since a rollback expires the item
+    item_id = inventory_item.id
+    target_shelf = update_data.get('shelf_name', inventory_item.shelf_name)
+    target_rack = update_data.get('rack_name', inventory_item.rack_name)
+    
     # If updating shelf_name or rack_name, check for conflicts
     if 'shelf_name' in update_data or 'rack_name' in update_data:
-        target_shelf = update_data.get('shelf_name', inventory_item.shelf_name)
-        target_rack = update_data.get('rack_name', inventory_item.rack_name)
-        
         # Check if rack is already occupied (excluding current item)
-        existing_rack = db.query(Inventory).filter(
-            Inventory.shelf_name == target_shelf,
-            Inventory.rack_name == target_rack,
-            Inventory.id != inventory_item.id
-        ).first()
-        
-        if existing_rack:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Rack '{target_rack}' is already occupied on shelf '{target_shelf}'"
-            )
+        if _rack_occupied(db, target_shelf, target_rack, exclude_id=item_id):
+            raise _rack_occupied_error(target_shelf, target_rack)
         
         # If moving to different shelf, check capacity
         if target_shelf != inventory_item.shelf_name:
@@ -184,9 +195,6 @@ def update_inventory_item(
                 )
     
     try:
-        if 'category' in update_data:
-            update_data['category'] = update_data['category'].value
-        
         for field, value in update_data.items():
             setattr(inventory_item, field, value)
         
@@ -195,6 +203,9 @@ def update_inventory_item(
         return inventory_item
     except IntegrityError:
         db.rollback()
+        # The unique shelf/rack index catches a rack taken since the check above
+        if _rack_occupied(db, target_shelf, target_rack, exclude_id=item_id):
+            raise _rack_occupied_error(target_shelf, target_rack)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Product number already exists"
@@ -222,4 +233,4 @@ def get_categories(
     current_user: Employee = Depends(require_store_manager)
 ):
     """Get all available product categories (Store Manager only)"""
-    return [category.value for category in CategoryEnum]
\ No newline at end of file
+    return Response(content=_CATEGORIES_JSON, media_type="application/json")
\ No newline at end of file
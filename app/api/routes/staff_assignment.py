@@ -112,8 +112,6 @@ def assign_staff_to_shelf(assignment_data: StaffAssignmentCreate, db: Session =
         notes=assignment_data.notes
     )
     db.add(assignment)
-    db.commit()
-    db.refresh(assignment)
 
     history = AssignmentHistory(
         employee_id=employee.employee_id,
@@ -123,7 +121,9 @@ def assign_staff_to_shelf(assignment_data: StaffAssignmentCreate, db: Session =
         notes=assignment_data.notes
     )
     db.add(history)
+    # Assignment and its history entry commit together
     db.commit()
+    db.refresh(assignment)
 
     return StaffAssignmentResponse(
         id=assignment.id,
@@ -262,8 +262,6 @@ def transfer_staff_to_different_shelf(assignment_id: int, new_shelf_id: str, not
     old_shelf_id = assignment.shelf_id
     assignment.shelf_id = new_shelf_id
     assignment.notes = notes
-    db.commit()
-    db.refresh(assignment)
 
     history = AssignmentHistory(
         employee_id=assignment.employee_id,
@@ -274,6 +272,7 @@ def transfer_staff_to_different_shelf(assignment_id: int, new_shelf_id: str, not
     )
     db.add(history)
     db.commit()
+    db.refresh(assignment)
 
     manager = db.query(Employee).filter(Employee.employee_id == assignment.assigned_by).first()
 
@@ -1,6 +1,8 @@
+from functools import lru_cache
+import time
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from jose import jwt, JWTError
+from jose import jwt, JWTError, ExpiredSignatureError
 from sqlalchemy.orm import Session
 from app.database.db import get_db
 from app.models.employee import Employee # adjust import path
@@ -9,6 +11,22 @@ from app.core.config import settings
 # Use HTTPBearer for Swagger "Bearer <token>" auth input
 bearer_scheme = HTTPBearer()
 
+@lru_cache(maxsize=4096)
+def _decode_verified(token: str) -> dict:
+    """Verify the token signature once per distinct token string"""
+    return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+
+def _decode_token(token: str) -> dict:
+    """Decode a bearer token, reusing the cached verification for repeat tokens"""
+    payload = _decode_verified(token)
+    
+    # jwt.decode only checked "exp" on the first call, so re-check it on cache hits
+    exp = payload.get("exp")
+    if exp is not None and exp <= time.time():
+        raise ExpiredSignatureError("Signature has expired.")
+    
+    return payload
+
 def get_current_user_role(
     credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
     db: Session = Depends(get_db)
@@ -16,7 +34,7 @@ def get_current_user_role(
     token = credentials.credentials  # Extract Bearer token string
 
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        payload = _decode_token(token)
         employee_id = payload.get("sub")
 
         if not employee_id:
@@ -39,7 +57,7 @@ def require_store_manager(
     token = credentials.credentials
     
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        payload = _decode_token(token)
         employee_id = payload.get("sub")
         role = payload.get("role")
         
@@ -1,16 +1,19 @@
-from app.api.routes import auth, role_protected
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from app.api.routes import auth, inventory,  shelf, staff_assignment, staff_dashboard, alerts
 from app.database.db import engine, Base
 from app.core.config import settings
 from app.api.routes import detect
 
-Base.metadata.create_all(bind=engine)
+# Schema creation is opt-in so worker start-up doesn't run DDL introspection
+if settings.INIT_DB:
+    Base.metadata.create_all(bind=engine)
 
 app = FastAPI(
     title="ShelfCam API",
     description="AI-Powered Retail Shelf Monitoring System",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 @app.get("/")
@@ -9,7 +9,8 @@ from sqlalchemy import (
     Float,
     Enum as SqlEnum,
     ForeignKey,
-    DateTime
+    DateTime,
+    Index
 )
 from sqlalchemy.orm import relationship
 
@@ -43,6 +44,15 @@ class AlertPriority(str, Enum):
     CRITICAL = "critical"
 
 
+# Plain-str value of every enum member, precomputed so serializers do a dict
+# lookup instead of going through the Enum.value descriptor per row
+_ENUM_VALUES = {
+    member: member.value
+    for enum_cls in (AlertType, AlertStatus, AlertPriority)
+    for member in enum_cls
+}
+
+
 # -------------------- ORM MODEL --------------------
 
 class Alert(Base):
@@ -86,9 +96,9 @@ class Alert(Base):
     def to_dict(self):
         return {
             "id": self.id,
-            "alert_type": self.alert_type,
-            "status": self.status,
-            "priority": self.priority,
+            "alert_type": _ENUM_VALUES.get(self.alert_type),
+            "status": _ENUM_VALUES.get(self.status),
+            "priority": _ENUM_VALUES.get(self.priority),
             "shelf_name": self.shelf_name,
             "rack_name": self.rack_name,
             "product_number": self.product_number,
@@ -110,6 +120,30 @@ class Alert(Base):
         }
 
 
+# Active-alert lookups by shelf (duplicate checks while processing uploads), newest last
+Index("ix_alert_lookup", Alert.status, Alert.shelf_name, Alert.rack_name, Alert.alert_type, Alert.created_at)
+
+
+_ALERT_FIELDS = tuple(column.key for column in Alert.__table__.columns)
+
+
+def alert_row_to_dict(alert: Alert) -> dict:
+    """Bulk-friendly counterpart of Alert.to_dict() for freshly loaded rows"""
+    # Reads the loaded column values straight from instance state and leaves
+    # datetimes as-is for ORJSONResponse to encode. Attributes missing from
+    # __dict__ (e.g. expired after a commit) go through getattr, which
+    # reloads them from the database instead of reporting None.
+    state = alert.__dict__
+    row = {
+        field: state[field] if field in state else getattr(alert, field)
+        for field in _ALERT_FIELDS
+    }
+    row["alert_type"] = _ENUM_VALUES.get(row["alert_type"])
+    row["status"] = _ENUM_VALUES.get(row["status"])
+    row["priority"] = _ENUM_VALUES.get(row["priority"])
+    return row
+
+
 # -------------------- Pydantic Models --------------------
 
 class AlertBase(BaseModel):
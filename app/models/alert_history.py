@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database.db import Base
@@ -17,3 +17,7 @@ class AlertHistory(Base):
     # Relationships
     alert = relationship("Alert")
     employee = relationship("Employee", foreign_keys=[performed_by])
+
+
+# Serves the per-alert history lookups, newest first, as an index range scan
+Index("ix_alert_history_alert_ts", AlertHistory.alert_id, AlertHistory.timestamp.desc())
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, func
+from sqlalchemy import Column, Integer, String, DateTime, Index, DDL, event, func
 from sqlalchemy.ext.declarative import declarative_base
 from app.database.db import Base
 
@@ -12,4 +12,21 @@ class Inventory(Base):
     category = Column(String(50), nullable=False)
     rack_name = Column(String(100), nullable=False)  # New field for rack name
     created_at = Column(DateTime, default=func.now())
-    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
\ No newline at end of file
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+
+# Serves the per-shelf inventory join and the shelf/rack slot checks; one item per rack
+Index("ix_inventory_shelf_rack", Inventory.shelf_name, Inventory.rack_name, unique=True)
+
+# Trigram index so the ILIKE '%name%' correct-location search is an index probe on PostgreSQL
+event.listen(
+    Inventory.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql")
+)
+Index(
+    "ix_inventory_name_trgm",
+    Inventory.product_name,
+    postgresql_using="gin",
+    postgresql_ops={"product_name": "gin_trgm_ops"}
+).ddl_if(dialect="postgresql")
\ No newline at end of file
@@ -1,7 +1,7 @@
 # app/services/alert_service.py - Updated without WebSocket/Notification services
-from typing import List, Dict, Optional
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, desc
+from typing import List, Dict, Optional, Set, Tuple, Union
+from sqlalchemy.orm import Session, raiseload
+from sqlalchemy import and_, or_, desc, update, insert, select, text, bindparam, func, literal, union_all, String
 from app.models.alert import Alert, AlertType, AlertStatus, AlertPriority
 from app.models.inventory import Inventory
 from app.models.shelf import Shelf
@@ -9,27 +9,112 @@ from app.models.staff_assignment import StaffAssignment
 from app.models.employee import Employee
 from app.models.alert_history import AlertHistory
 import json
+from bisect import bisect_right
 from datetime import datetime, timedelta
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Shelf-level alert types that track fill percentage
+STOCK_ALERT_TYPES = frozenset([
+    AlertType.LOW_STOCK, AlertType.MEDIUM_STOCK, AlertType.HIGH_STOCK,
+    AlertType.CRITICAL_STOCK, AlertType.OUT_OF_STOCK
+])
+
+# Status transitions, built once and reused; the WHERE clause only matches
+# alerts whose current status allows the transition
+ACKNOWLEDGE_ALERTS = (
+    update(Alert)
+    .where(
+        Alert.id.in_(bindparam("alert_ids", expanding=True)),
+        Alert.status == AlertStatus.ACTIVE
+    )
+    .values(status=AlertStatus.ACKNOWLEDGED, acknowledged_at=bindparam("now"), updated_at=bindparam("now"))
+    .returning(Alert.id)
+)
+RESOLVE_ALERTS = (
+    update(Alert)
+    .where(
+        Alert.id.in_(bindparam("alert_ids", expanding=True)),
+        Alert.status.in_([AlertStatus.ACTIVE, AlertStatus.ACKNOWLEDGED])
+    )
+    .values(status=AlertStatus.RESOLVED, resolved_at=bindparam("now"), updated_at=bindparam("now"))
+    .returning(Alert.id)
+)
+
+PRIORITY_EMOJI = {
+    AlertPriority.CRITICAL: "🚨",
+    AlertPriority.HIGH: "🔴",
+    AlertPriority.MEDIUM: "🟡",
+    AlertPriority.LOW: "🟢"
+}
+
+def _compile_stock_rules(thresholds: Dict[str, float]):
+    """Build a (shelf_name, fill_percentage) -> (alert_type, priority, title, message) rule,
+    or None when stock is fine, with each band's title and message templates prepared up front"""
+    
+    # Ascending bands for bisect: a fill below a band's limit (and not below
+    # the previous one) gets that band's type and priority
+    bands = [
+        (thresholds["critical"], AlertType.CRITICAL_STOCK, AlertPriority.CRITICAL),
+        (thresholds["high"], AlertType.HIGH_STOCK, AlertPriority.HIGH),
+        (thresholds["medium"], AlertType.MEDIUM_STOCK, AlertPriority.MEDIUM),
+        (thresholds["low"], AlertType.LOW_STOCK, AlertPriority.LOW)
+    ]
+    limits = [limit for limit, _, _ in bands]
+    rules = [
+        (
+            alert_type,
+            priority,
+            f"{PRIORITY_EMOJI[priority]} {priority.value.upper()} STOCK: Shelf {{shelf}}",
+            f"Shelf {{shelf}} has {priority.value} stock levels. Current fill: {{fill:.1f}}%"
+        )
+        for _, alert_type, priority in bands
+    ]
+    out_of_stock_rule = (
+        AlertType.OUT_OF_STOCK,
+        AlertPriority.CRITICAL,
+        f"{PRIORITY_EMOJI[AlertPriority.CRITICAL]} OUT OF STOCK: Shelf {{shelf}}",
+        "URGENT: Shelf {shelf} is completely empty (0% filled). Immediate restocking required!"
+    )
+    
+    def evaluate(shelf_name: str, fill_percentage: float):
+        band = bisect_right(limits, fill_percentage)
+        if band == len(rules):
+            return None
+        
+        alert_type, priority, title, message = (
+            out_of_stock_rule if band == 0 and fill_percentage <= 0 else rules[band]
+        )
+        return (
+            alert_type,
+            priority,
+            title.format(shelf=shelf_name),
+            message.format(shelf=shelf_name, fill=fill_percentage)
+        )
+    
+    return evaluate
+
 class AlertService:
+    # SHELF-LEVEL STOCK THRESHOLDS
+    STOCK_THRESHOLDS = {
+        "critical": 10,     # < 10% filled (>90% empty) = CRITICAL
+        "high": 25,         # < 25% filled (>75% empty) = HIGH
+        "medium": 50,       # < 50% filled (>50% empty) = MEDIUM
+        "low": 75           # < 75% filled (>25% empty) = LOW
+    }
+    # Compiled once at import rather than for every request's service
+    _evaluate_stock = staticmethod(_compile_stock_rules(STOCK_THRESHOLDS))
+    
     def __init__(self, db: Session):
         self.db = db
-        
-        # SHELF-LEVEL STOCK THRESHOLDS
-        self.STOCK_THRESHOLDS = {
-            "critical": 10,     # < 10% filled (>90% empty) = CRITICAL
-            "high": 25,         # < 25% filled (>75% empty) = HIGH
-            "medium": 50,       # < 50% filled (>50% empty) = MEDIUM
-            "low": 75           # < 75% filled (>25% empty) = LOW
-        }
     
     def process_json_data(self, json_data: Dict) -> Dict:
         """Main method to process JSON data and create alerts"""
         try:
-            logger.info(f"Processing alert data: {json_data}")
+            # Skip building the payload repr unless it will be logged
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("Processing alert data: %s", json_data)
             
             alerts_created = []
             errors = []
@@ -42,6 +127,11 @@ class AlertService:
             if not shelf_number:
                 raise ValueError("Invalid JSON structure: 'shelf_number' is required")
             
+            # Alerts are regenerated on the next upload, so this transaction
+            # doesn't need to wait for the WAL flush on commit
+            if self.db.get_bind().dialect.name == "postgresql":
+                self.db.execute(text("SET LOCAL synchronous_commit TO OFF"))
+            
             try:
                 shelf_alerts = self._process_shelf_data(shelf_number, empty_percentage, items_detected)
                 alerts_created.extend(shelf_alerts)
@@ -50,20 +140,25 @@ class AlertService:
                 logger.error(error_msg)
                 errors.append(error_msg)
             
+            # Serialize while the alerts are still loaded; once committed they
+            # are expired and to_dict() would re-SELECT each one
+            self.db.flush()
+            alerts_data = [alert.to_dict() for alert in alerts_created]
+            
             # Commit all changes
             self.db.commit()
             
-            logger.info(f"Successfully processed {len(alerts_created)} alerts for shelf {shelf_number}")
+            logger.info("Successfully processed %d alerts for shelf %s", len(alerts_created), shelf_number)
             
             return {
                 "success": True,
                 "alerts_created": len(alerts_created),
-                "alerts": [alert.to_dict() for alert in alerts_created],
+                "alerts": alerts_data,
                 "errors": errors
             }
             
         except Exception as e:
-            logger.error(f"Error processing alert data: {str(e)}")
+            logger.error("Error processing alert data: %s", e)
             self.db.rollback()
             return {
                 "success": False,
@@ -77,95 +172,94 @@ class AlertService:
         """Process shelf data and create alerts"""
         alerts = []
         
-        logger.info(f"Processing shelf {shelf_number}: {empty_percentage}% empty, items: {items_detected}")
+        logger.info("Processing shelf %s: %s%% empty, items: %s", shelf_number, empty_percentage, items_detected)
         
         # Calculate fill percentage
         fill_percentage = 100.0 - empty_percentage
         
-        # Check if shelf exists in database
-        shelf = self.db.query(Shelf).filter(Shelf.name == shelf_number).first()
-        if not shelf:
-            logger.warning(f"Shelf {shelf_number} not found in database")
+        # Check the shelf exists and get its assigned staff and inventory in one
+        # round-trip; the outer join yields a single (staff, None) row for an empty shelf
+        assigned_staff = select(StaffAssignment.employee_id).where(
+            StaffAssignment.shelf_id == Shelf.name,
+            StaffAssignment.is_active == True
+        ).limit(1).scalar_subquery()
+        shelf_rows = self.db.query(assigned_staff, Inventory).select_from(Shelf).outerjoin(
+            Inventory, Inventory.shelf_name == Shelf.name
+        ).filter(Shelf.name == shelf_number).all()
+        if not shelf_rows:
+            logger.warning("Shelf %s not found in database", shelf_number)
             # Create alert for unknown shelf
             unknown_alert = self._create_unknown_shelf_alert(shelf_number, items_detected)
             if unknown_alert:
                 alerts.append(unknown_alert)
             return alerts
         
-        # Get inventory items for this shelf
-        inventory_items = self.db.query(Inventory).filter(
-            Inventory.shelf_name == shelf_number
-        ).all()
+        assigned_staff_id = shelf_rows[0][0]
+        inventory_items = [item for _, item in shelf_rows if item is not None]
+        
+        # Load the shelf's active alerts once for the duplicate checks below
+        stock_alerts, misplaced_alerts, missing_alert = self._get_active_shelf_alerts(shelf_number)
         
         # Check stock levels
-        stock_alert = self._check_stock_levels(shelf_number, fill_percentage, empty_percentage, inventory_items)
+        stock_alert = self._check_stock_levels(shelf_number, fill_percentage, empty_percentage,
+                                               inventory_items, stock_alerts, assigned_staff_id)
         if stock_alert:
             alerts.append(stock_alert)
         
         # Check for misplaced items
-        misplacement_alerts = self._check_misplacement(shelf_number, items_detected, inventory_items)
+        misplacement_alerts = self._check_misplacement(shelf_number, items_detected, inventory_items,
+                                                       misplaced_alerts, missing_alert, assigned_staff_id)
         alerts.extend(misplacement_alerts)
         
         return alerts
     
+    def _get_active_shelf_alerts(self, shelf_name: str) -> Tuple[List[Alert], Dict[str, Alert], Optional[Alert]]:
+        """Split a shelf's active alerts into stock alerts, misplaced alerts by item and the missing-items alert"""
+        
+        stock_alerts = []
+        misplaced_alerts = {}
+        missing_alert = None
+        
+        active_alerts = self.db.query(Alert).filter(
+            and_(
+                Alert.shelf_name == shelf_name,
+                Alert.status == AlertStatus.ACTIVE
+            )
+        ).all()
+        
+        for alert in active_alerts:
+            if alert.alert_type in STOCK_ALERT_TYPES:
+                if alert.rack_name is None:  # Shelf-level alert
+                    stock_alerts.append(alert)
+            elif alert.alert_type == AlertType.MISPLACED_ITEM:
+                if "MISSING ITEMS" in alert.title:
+                    missing_alert = missing_alert or alert
+                elif alert.actual_product is not None:
+                    misplaced_alerts.setdefault(alert.actual_product, alert)
+        
+        return stock_alerts, misplaced_alerts, missing_alert
+    
     def _check_stock_levels(self, shelf_name: str, fill_percentage: float, 
-                           empty_percentage: float, inventory_items: List[Inventory]) -> Optional[Alert]:
+                           empty_percentage: float, inventory_items: List[Inventory],
+                           existing_alerts: List[Alert], assigned_staff_id: Optional[str]) -> Optional[Alert]:
         """Check stock levels and create alerts"""
         
-        # Determine priority and alert type based on fill percentage
-        alert_type = None
-        priority = None
-        
-        if fill_percentage < self.STOCK_THRESHOLDS["critical"]:
-            alert_type = AlertType.CRITICAL_STOCK if fill_percentage > 0 else AlertType.OUT_OF_STOCK
-            priority = AlertPriority.CRITICAL
-        elif fill_percentage < self.STOCK_THRESHOLDS["high"]:
-            alert_type = AlertType.HIGH_STOCK
-            priority = AlertPriority.HIGH
-        elif fill_percentage < self.STOCK_THRESHOLDS["medium"]:
-            alert_type = AlertType.MEDIUM_STOCK
-            priority = AlertPriority.MEDIUM
-        elif fill_percentage < self.STOCK_THRESHOLDS["low"]:
-            alert_type = AlertType.LOW_STOCK
-            priority = AlertPriority.LOW
-        
-        if not alert_type:
+        # Determine alert type, priority, title and message based on fill percentage
+        stock_rule = self._evaluate_stock(shelf_name, fill_percentage)
+        
+        if stock_rule is None:
             # Stock level is fine, remove any existing stock alerts
-            self._resolve_existing_stock_alerts(shelf_name)
+            self._resolve_existing_stock_alerts(existing_alerts)
             return None
         
-        # Create alert title and message
-        priority_emoji = {
-            AlertPriority.CRITICAL: "🚨",
-            AlertPriority.HIGH: "🔴",
-            AlertPriority.MEDIUM: "🟡",
-            AlertPriority.LOW: "🟢"
-        }
-        
-        emoji = priority_emoji.get(priority, "📢")
-        
-        if alert_type == AlertType.OUT_OF_STOCK:
-            title = f"{emoji} OUT OF STOCK: Shelf {shelf_name}"
-            message = f"URGENT: Shelf {shelf_name} is completely empty (0% filled). Immediate restocking required!"
-        else:
-            title = f"{emoji} {priority.value.upper()} STOCK: Shelf {shelf_name}"
-            message = f"Shelf {shelf_name} has {priority.value} stock levels. Current fill: {fill_percentage:.1f}%"
+        alert_type, priority, title, message = stock_rule
         
         # Get shelf categories for context
         categories = list(set([item.category for item in inventory_items if item.category]))
         category_text = ", ".join(categories) if categories else "Mixed"
         
         # Check for existing active stock alert
-        existing_alert = self.db.query(Alert).filter(
-            and_(
-                Alert.shelf_name == shelf_name,
-                Alert.rack_name.is_(None),  # Shelf-level alert
-                Alert.status == AlertStatus.ACTIVE,
-                Alert.alert_type.in_([AlertType.LOW_STOCK, AlertType.MEDIUM_STOCK, 
-                                    AlertType.HIGH_STOCK, AlertType.CRITICAL_STOCK, 
-                                    AlertType.OUT_OF_STOCK])
-            )
-        ).first()
+        existing_alert = existing_alerts[0] if existing_alerts else None
         
         if existing_alert:
             # Update existing alert
@@ -182,12 +276,10 @@ class AlertService:
             self._log_alert_action(existing_alert.id, "updated", None, 
                                  f"Stock level updated to {fill_percentage:.1f}%")
             
-            logger.info(f"Updated existing stock alert for shelf {shelf_name}")
+            logger.info("Updated existing stock alert for shelf %s", shelf_name)
             return existing_alert
         else:
             # Create new alert
-            assigned_staff_id = self._get_assigned_staff_id(shelf_name)
-            
             alert = Alert(
                 alert_type=alert_type,
                 priority=priority,
@@ -206,17 +298,17 @@ class AlertService:
             )
             
             self.db.add(alert)
-            self.db.flush()  # Get the ID
             
             # Log the creation
-            self._log_alert_action(alert.id, "created", None, 
+            self._log_alert_action(alert, "created", None, 
                                  f"Stock alert created for {fill_percentage:.1f}% fill level")
             
-            logger.info(f"Created new stock alert for shelf {shelf_name}")
+            logger.info("Created new stock alert for shelf %s", shelf_name)
             return alert
     
     def _check_misplacement(self, shelf_name: str, items_detected: List[str], 
-                           inventory_items: List[Inventory]) -> List[Alert]:
+                           inventory_items: List[Inventory], existing_misplaced: Dict[str, Alert],
+                           existing_missing: Optional[Alert], assigned_staff_id: Optional[str]) -> List[Alert]:
         """Check for misplaced items on shelf"""
         
         alerts = []
@@ -224,58 +316,87 @@ class AlertService:
         if not items_detected:
             return alerts
         
+        # New alerts aren't flushed until commit, so the existing-alert query
+        # can't see them; remember each item's alert for repeated detections
+        misplaced_alerts: Dict[str, Alert] = {}
+        
         # Get expected item names for this shelf
-        expected_items = set([item.product_name.lower() for item in inventory_items])
+        expected_items = {item.product_name.lower() for item in inventory_items}
+        # Whole names and their words: a hit on either implies a substring match
+        expected_tokens = expected_items.union(*(name.split() for name in expected_items))
         
-        # Check each detected item
+        # Check each detected item; detections repeat names, so each one is matched once
+        misplaced_items = []
+        expected_by_name: Dict[str, bool] = {}
         for detected_item in items_detected:
             if not detected_item:
                 continue
                 
             detected_item_lower = detected_item.lower()
             
-            # Check if detected item matches any expected item (fuzzy matching)
-            is_expected = any(
-                detected_item_lower in expected.lower() or 
-                expected.lower() in detected_item_lower or
-                detected_item_lower == expected.lower()
-                for expected in expected_items
-            )
+            is_expected = expected_by_name.get(detected_item_lower)
+            if is_expected is None:
+                # Check if detected item matches any expected item: exact name or word
+                # first, then fuzzy matching (names are already lowercased)
+                is_expected = detected_item_lower in expected_tokens or any(
+                    detected_item_lower in expected or expected in detected_item_lower
+                    for expected in expected_items
+                )
+                expected_by_name[detected_item_lower] = is_expected
             
             if not is_expected:
                 # This is a misplaced item
+                misplaced_items.append(detected_item)
+        
+        # Find where all misplaced items belong with a single query
+        correct_locations = self._find_correct_locations(set(misplaced_items))
+        
+        for detected_item in misplaced_items:
+            misplacement_alert = misplaced_alerts.get(detected_item)
+            if misplacement_alert is None:
                 misplacement_alert = self._create_misplacement_alert(
-                    shelf_name, detected_item, inventory_items
+                    shelf_name, detected_item, inventory_items,
+                    existing_misplaced.get(detected_item),
+                    correct_locations.get(detected_item),
+                    assigned_staff_id
                 )
-                if misplacement_alert:
-                    alerts.append(misplacement_alert)
+                misplaced_alerts[detected_item] = misplacement_alert
+            else:
+                # A repeated detection updates the alert made for the first one
+                misplacement_alert.updated_at = datetime.utcnow()
+                self._log_alert_action(misplacement_alert, "updated", None, 
+                                     f"Misplacement updated: {detected_item}")
+            if misplacement_alert:
+                alerts.append(misplacement_alert)
         
         # Also check for missing expected items (if shelf is not empty)
         if items_detected and len(items_detected) > 0:
             missing_items = []
+            detected_lower = [detected.lower() for detected in items_detected]
             for inventory_item in inventory_items:
+                product_name_lower = inventory_item.product_name.lower()
                 item_found = any(
-                    inventory_item.product_name.lower() in detected.lower() or
-                    detected.lower() in inventory_item.product_name.lower()
-                    for detected in items_detected
+                    product_name_lower in detected or detected in product_name_lower
+                    for detected in detected_lower
                 )
                 if not item_found:
                     missing_items.append(inventory_item.product_name)
             
             if missing_items:
-                missing_alert = self._create_missing_items_alert(shelf_name, missing_items)
+                missing_alert = self._create_missing_items_alert(shelf_name, missing_items, existing_missing,
+                                                                 assigned_staff_id)
                 if missing_alert:
                     alerts.append(missing_alert)
         
         return alerts
     
     def _create_misplacement_alert(self, shelf_name: str, detected_item: str, 
-                                  inventory_items: List[Inventory]) -> Optional[Alert]:
+                                  inventory_items: List[Inventory],
+                                  existing_alert: Optional[Alert],
+                                  correct_location: Optional[str],
+                                  assigned_staff_id: Optional[str]) -> Optional[Alert]:
         """Create alert for misplaced item"""
         
-        # Find correct location for the detected item
-        correct_location = self._find_correct_location(detected_item)
-        
         title = f"🔄 MISPLACED: {detected_item} on Shelf {shelf_name}"
         message = f"Wrong item '{detected_item}' found on shelf {shelf_name}."
         
@@ -289,16 +410,6 @@ class AlertService:
         if correct_location:
             message += f" | Correct location: {correct_location}"
         
-        # Check for existing misplacement alert for this item
-        existing_alert = self.db.query(Alert).filter(
-            and_(
-                Alert.shelf_name == shelf_name,
-                Alert.alert_type == AlertType.MISPLACED_ITEM,
-                Alert.actual_product == detected_item,
-                Alert.status == AlertStatus.ACTIVE
-            )
-        ).first()
-        
         if existing_alert:
             # Update existing alert
             existing_alert.title = title
@@ -312,8 +423,6 @@ class AlertService:
             return existing_alert
         else:
             # Create new alert
-            assigned_staff_id = self._get_assigned_staff_id(shelf_name)
-            
             alert = Alert(
                 alert_type=AlertType.MISPLACED_ITEM,
                 priority=AlertPriority.MEDIUM,
@@ -333,14 +442,15 @@ class AlertService:
             )
             
             self.db.add(alert)
-            self.db.flush()
             
-            self._log_alert_action(alert.id, "created", None, 
+            self._log_alert_action(alert, "created", None, 
                                  f"Misplacement alert created: {detected_item}")
             
             return alert
     
-    def _create_missing_items_alert(self, shelf_name: str, missing_items: List[str]) -> Optional[Alert]:
+    def _create_missing_items_alert(self, shelf_name: str, missing_items: List[str],
+                                   existing_alert: Optional[Alert],
+                                   assigned_staff_id: Optional[str]) -> Optional[Alert]:
         """Create alert for missing expected items"""
         
         if not missing_items:
@@ -352,16 +462,6 @@ class AlertService:
         if len(missing_items) > 5:
             message += f" (and {len(missing_items) - 5} more)"
         
-        # Check for existing missing items alert
-        existing_alert = self.db.query(Alert).filter(
-            and_(
-                Alert.shelf_name == shelf_name,
-                Alert.alert_type == AlertType.MISPLACED_ITEM,
-                Alert.title.like("%MISSING ITEMS%"),
-                Alert.status == AlertStatus.ACTIVE
-            )
-        ).first()
-        
         if existing_alert:
             # Update existing alert
             existing_alert.title = title
@@ -374,8 +474,6 @@ class AlertService:
             return existing_alert
         else:
             # Create new alert
-            assigned_staff_id = self._get_assigned_staff_id(shelf_name)
-            
             alert = Alert(
                 alert_type=AlertType.MISPLACED_ITEM,
                 priority=AlertPriority.LOW,
@@ -395,9 +493,8 @@ class AlertService:
             )
             
             self.db.add(alert)
-            self.db.flush()
             
-            self._log_alert_action(alert.id, "created", None, 
+            self._log_alert_action(alert, "created", None, 
                                  f"Missing items alert created: {len(missing_items)} items")
             
             return alert
@@ -428,40 +525,34 @@ class AlertService:
         )
         
         self.db.add(alert)
-        self.db.flush()
         
-        self._log_alert_action(alert.id, "created", None, 
+        self._log_alert_action(alert, "created", None, 
                              f"Unknown shelf alert: {shelf_number}")
         
         return alert
     
-    def _find_correct_location(self, item_name: str) -> Optional[str]:
-        """Find correct location for misplaced item"""
-        
-        # Search for item in inventory
-        inventory_items = self.db.query(Inventory).filter(
-            Inventory.product_name.ilike(f"%{item_name}%")
-        ).all()
-        
-        if inventory_items:
-            return inventory_items[0].shelf_name  # Return shelf name only
-        
-        return None
+    def _find_correct_locations(self, item_names: Set[str]) -> Dict[str, str]:
+        """Find correct locations (shelf names) for misplaced items"""
+        
+        if not item_names:
+            return {}
+        
+        # One query for all items: a UNION ALL of each name's first ILIKE match,
+        # tagged with the name so the database decides which name matched
+        lookups = [
+            select(
+                literal(item_name, String).label("item_name"),
+                Inventory.shelf_name
+            ).where(Inventory.product_name.ilike(f"%{item_name}%")).limit(1).subquery()
+            for item_name in item_names
+        ]
+        matches = self.db.execute(union_all(*(select(lookup) for lookup in lookups))).all()
+        
+        return {item_name: shelf_name for item_name, shelf_name in matches}
     
-    def _resolve_existing_stock_alerts(self, shelf_name: str):
+    def _resolve_existing_stock_alerts(self, existing_alerts: List[Alert]):
         """Resolve existing stock alerts when stock is back to normal"""
         
-        existing_alerts = self.db.query(Alert).filter(
-            and_(
-                Alert.shelf_name == shelf_name,
-                Alert.rack_name.is_(None),
-                Alert.status == AlertStatus.ACTIVE,
-                Alert.alert_type.in_([AlertType.LOW_STOCK, AlertType.MEDIUM_STOCK, 
-                                    AlertType.HIGH_STOCK, AlertType.CRITICAL_STOCK, 
-                                    AlertType.OUT_OF_STOCK])
-            )
-        ).all()
-        
         for alert in existing_alerts:
             alert.status = AlertStatus.RESOLVED
             alert.resolved_at = datetime.utcnow()
@@ -470,118 +561,163 @@ class AlertService:
             self._log_alert_action(alert.id, "auto_resolved", None, 
                                  "Stock level returned to normal")
     
-    def _get_assigned_staff_id(self, shelf_name: str) -> Optional[str]:
-        """Get assigned staff ID for a shelf"""
-        
-        assignment = self.db.query(StaffAssignment).filter(
-            and_(
-                StaffAssignment.shelf_id == shelf_name,
-                StaffAssignment.is_active == True
-            )
-        ).first()
-        
-        return assignment.employee_id if assignment else None
-    
-    def _log_alert_action(self, alert_id: int, action: str, employee_id: Optional[str], notes: Optional[str]):
-        """Log alert action to history"""
+    def _log_alert_action(self, alert: Union[int, Alert], action: str, employee_id: Optional[str],
+                          notes: Optional[str]):
+        """Log alert action to history (`alert` is an alert id, or an Alert that may not be flushed yet)"""
         
         try:
             history = AlertHistory(
-                alert_id=alert_id,
                 action=action,
                 performed_by=employee_id,
                 notes=notes,
                 timestamp=datetime.utcnow()
             )
+            if isinstance(alert, Alert):
+                # The ORM fills in alert_id once a pending alert is inserted
+                history.alert = alert
+            else:
+                history.alert_id = alert
             self.db.add(history)
         except Exception as e:
-            logger.error(f"Error logging alert action: {str(e)}")
+            logger.error("Error logging alert action: %s", e)
+    
+    def _log_alert_actions(self, alert_ids: List[int], action: str, employee_id: Optional[str], notes: Optional[str]):
+        """Log the same action for several alerts with one executemany INSERT"""
+        
+        timestamp = datetime.utcnow()
+        self.db.execute(insert(AlertHistory), [
+            {
+                "alert_id": alert_id,
+                "action": action,
+                "performed_by": employee_id,
+                "notes": notes,
+                "timestamp": timestamp
+            }
+            for alert_id in alert_ids
+        ])
     
     # Additional methods for API endpoints
-    def get_active_alerts(self, employee_id: Optional[str] = None) -> List[Alert]:
-        """Get active alerts for dashboard"""
-        
-        query = self.db.query(Alert).filter(Alert.status == AlertStatus.ACTIVE)
+    def get_active_alerts(self, employee_id: Optional[str] = None,
+                          employee: Optional[Employee] = None,
+                          priority: Optional[AlertPriority] = None,
+                          alert_type: Optional[AlertType] = None,
+                          shelf_name: Optional[str] = None,
+                          limit: Optional[int] = None) -> List[Alert]:
+        """Get active alerts for dashboard (pass `employee` if already loaded),
+        optionally filtered and capped in SQL"""
+        
+        # Callers only serialize alert columns; make a per-alert lazy load of
+        # assigned_staff fail loudly instead of quietly adding N queries
+        query = self.db.query(Alert).options(
+            raiseload(Alert.assigned_staff)
+        ).filter(Alert.status == AlertStatus.ACTIVE)
         
         if employee_id:
-            employee = self.db.query(Employee).filter(Employee.employee_id == employee_id).first()
+            if employee is None:
+                employee = self.db.query(Employee).filter(Employee.employee_id == employee_id).first()
             # Only show assigned alerts for regular staff, show all for managers
             if employee and employee.role not in ["manager", "store_manager"]:
                 query = query.filter(Alert.assigned_staff_id == employee_id)
         
-        return query.order_by(desc(Alert.priority), desc(Alert.created_at)).all()
+        if priority:
+            query = query.filter(Alert.priority == priority)
+        if alert_type:
+            query = query.filter(Alert.alert_type == alert_type)
+        if shelf_name:
+            query = query.filter(Alert.shelf_name == shelf_name)
+        
+        query = query.order_by(desc(Alert.priority), desc(Alert.created_at))
+        if limit:
+            query = query.limit(limit)
+        
+        return query.all()
+    
+    def count_active_alerts(self) -> int:
+        """Count active alerts without loading them"""
+        
+        return self.db.query(func.count(Alert.id)).filter(
+            Alert.status == AlertStatus.ACTIVE
+        ).scalar()
     
     def acknowledge_alert(self, alert_id: int, employee_id: str) -> bool:
         """Acknowledge an alert"""
         
-        alert = self.db.query(Alert).filter(Alert.id == alert_id).first()
-        if alert and alert.status == AlertStatus.ACTIVE:
-            alert.status = AlertStatus.ACKNOWLEDGED
-            alert.acknowledged_at = datetime.utcnow()
-            alert.updated_at = datetime.utcnow()
-            
-            self._log_alert_action(alert_id, "acknowledged", employee_id, "Alert acknowledged")
-            
-            self.db.commit()
-            return True
-        
-        return False
+        return bool(self.acknowledge_alerts([alert_id], employee_id))
     
     def resolve_alert(self, alert_id: int, employee_id: str) -> bool:
         """Resolve an alert"""
         
-        alert = self.db.query(Alert).filter(Alert.id == alert_id).first()
-        if alert and alert.status in [AlertStatus.ACTIVE, AlertStatus.ACKNOWLEDGED]:
-            alert.status = AlertStatus.RESOLVED
-            alert.resolved_at = datetime.utcnow()
-            alert.updated_at = datetime.utcnow()
-            
-            self._log_alert_action(alert_id, "resolved", employee_id, "Alert resolved")
-            
-            self.db.commit()
-            return True
-        
-        return False
+        return bool(self.resolve_alerts([alert_id], employee_id))
     
-    def get_alert_statistics(self) -> Dict:
-        """Get alert statistics for dashboard"""
+    def acknowledge_alerts(self, alert_ids: List[int], employee_id: str) -> List[int]:
+        """Acknowledge several alerts in one transaction, returning the ids that changed"""
         
-        total_active = self.db.query(Alert).filter(Alert.status == AlertStatus.ACTIVE).count()
+        acknowledged_ids = self.db.execute(
+            ACKNOWLEDGE_ALERTS, {"alert_ids": alert_ids, "now": datetime.utcnow()}
+        ).scalars().all()
         
-        critical_alerts = self.db.query(Alert).filter(
-            and_(
-                Alert.status == AlertStatus.ACTIVE,
-                Alert.priority == AlertPriority.CRITICAL
-            )
-        ).count()
+        if acknowledged_ids:
+            self._log_alert_actions(acknowledged_ids, "acknowledged", employee_id, "Alert acknowledged")
+            self.db.commit()
         
-        high_alerts = self.db.query(Alert).filter(
-            and_(
-                Alert.status == AlertStatus.ACTIVE,
-                Alert.priority == AlertPriority.HIGH
-            )
-        ).count()
+        return acknowledged_ids
+    
+    def resolve_alerts(self, alert_ids: List[int], employee_id: str) -> List[int]:
+        """Resolve several alerts in one transaction, returning the ids that changed"""
         
-        stock_alerts = self.db.query(Alert).filter(
-            and_(
-                Alert.status == AlertStatus.ACTIVE,
-                Alert.alert_type.in_([AlertType.LOW_STOCK, AlertType.MEDIUM_STOCK, 
-                                    AlertType.HIGH_STOCK, AlertType.CRITICAL_STOCK,
-                                    AlertType.OUT_OF_STOCK])
-            )
-        ).count()
+        resolved_ids = self.db.execute(
+            RESOLVE_ALERTS, {"alert_ids": alert_ids, "now": datetime.utcnow()}
+        ).scalars().all()
         
-        misplaced_alerts = self.db.query(Alert).filter(
-            and_(
-                Alert.status == AlertStatus.ACTIVE,
-                Alert.alert_type == AlertType.MISPLACED_ITEM
-            )
-        ).count()
+        if resolved_ids:
+            self._log_alert_actions(resolved_ids, "resolved", employee_id, "Alert resolved")
+            self.db.commit()
         
-        return {
+        return resolved_ids
+    
+    def get_alert_statistics(self, include_totals: bool = False) -> Dict:
+        """Get alert statistics for dashboard (with all-status totals if include_totals)"""
+        
+        # One query, counted per (status, priority, type) and summed here
+        query = self.db.query(Alert.status, Alert.priority, Alert.alert_type, func.count(Alert.id))
+        if not include_totals:
+            query = query.filter(Alert.status == AlertStatus.ACTIVE)
+        counts = query.group_by(Alert.status, Alert.priority, Alert.alert_type).all()
+        
+        total_alerts = resolved_alerts = acknowledged_alerts = 0
+        total_active = critical_alerts = high_alerts = stock_alerts = misplaced_alerts = 0
+        for status, priority, alert_type, count in counts:
+            total_alerts += count
+            if status == AlertStatus.RESOLVED:
+                resolved_alerts += count
+            elif status == AlertStatus.ACKNOWLEDGED:
+                acknowledged_alerts += count
+            if status != AlertStatus.ACTIVE:
+                continue
+            
+            total_active += count
+            if priority == AlertPriority.CRITICAL:
+                critical_alerts += count
+            elif priority == AlertPriority.HIGH:
+                high_alerts += count
+            if alert_type in STOCK_ALERT_TYPES:
+                stock_alerts += count
+            elif alert_type == AlertType.MISPLACED_ITEM:
+                misplaced_alerts += count
+        
+        statistics = {
             "total_active": total_active,
             "critical_alerts": critical_alerts,
             "high_alerts": high_alerts,
             "stock_alerts": stock_alerts,
             "misplaced_alerts": misplaced_alerts
-        }
\ No newline at end of file
+        }
+        
+        if include_totals:
+            statistics.update({
+                "total_alerts": total_alerts,
+                "resolved_alerts": resolved_alerts,
+                "acknowledged_alerts": acknowledged_alerts
+            })
+        
+        return statistics
\ No newline at end of file
@@ -1,7 +1,8 @@
 # app/services/notification_service.py
-from typing import List
+from typing import Dict, List, Tuple
 from app.models.employee import Employee
 from app.models.alert import Alert
+from app.services.alert_service import PRIORITY_EMOJI
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
@@ -10,6 +11,19 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+ALERT_TYPE_EMOJI = {
+    'low_stock': '📦',
+    'out_of_stock': '🚫',
+    'misplaced_item': '🔄',
+    'expired_product': '⏰'
+}
+
+SECTION_RULE = "━" * 64
+
+def _section(title: str) -> str:
+    """Email section heading between two rules"""
+    return f"{SECTION_RULE}\n{title}\n{SECTION_RULE}"
+
 class NotificationService:
     def __init__(self):
         self.smtp_server = getattr(settings, 'SMTP_SERVER', 'smtp.gmail.com')
@@ -21,46 +35,17 @@ class NotificationService:
     def send_staff_notification(self, staff: Employee, alert: Alert):
         """Send notification to assigned staff"""
         
-        priority_emoji = {
-            "critical": "🚨",
-            "high": "🔴",
-            "medium": "🟡",
-            "low": "🟢"
-        }
-        
-        subject = f"{priority_emoji.get(alert.priority.value, '📢')} ShelfCam Alert: {alert.title}"
+        subject = f"{PRIORITY_EMOJI.get(alert.priority, '📢')} ShelfCam Alert: {alert.title}"
         
-        body = f"""
-Dear {staff.username},
-
-A new alert has been assigned to you:
-
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-🏷️  Alert Details
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-
-📊 Alert Type: {alert.alert_type.value.replace('_', ' ').title()}
+        details = f"""📊 Alert Type: {alert.alert_type.value.replace('_', ' ').title()}
 ⚠️  Priority: {alert.priority.value.upper()}
 🏪 Location: {alert.shelf_name} - {alert.rack_name}
 📦 Product: {alert.product_name}
 🔢 Product #: {alert.product_number}
 
-💬 Message: {alert.message}
-
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-📝 Action Required
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-
-Please visit the location and take appropriate action:
-• For stock alerts: Restock the item as needed
-• For misplacement alerts: Reorganize items to correct positions
-
-Don't forget to acknowledge this alert in your ShelfCam dashboard once resolved.
-
-Best regards,
-ShelfCam Alert System
-Generated at: {alert.created_at.strftime('%Y-%m-%d %H:%M:%S')}
-        """
+💬 Message: {alert.message}"""
+        
+        body = self._staff_email_body(staff, [alert], "A new alert has been assigned to you:", details)
         
         self._send_email(staff.email, subject, body)
     
@@ -78,9 +63,7 @@ Dear Store Manager,
 
 A new alert has been generated in your store:
 
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-🏷️  Alert Summary
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+{_section('🏷️  Alert Summary')}
 
 📊 Alert Type: {alert.alert_type.value.replace('_', ' ').title()}
 ⚠️  Priority: {alert.priority.value.upper()}
@@ -90,9 +73,7 @@ A new alert has been generated in your store:
 👤 Assigned Staff: {assigned_staff_name}
 💬 Details: {alert.message}
 
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-📊 Management Actions
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+{_section('📊 Management Actions')}
 
 • Monitor alert resolution progress
 • Ensure staff responds within appropriate timeframe
@@ -107,14 +88,72 @@ Generated at: {alert.created_at.strftime('%Y-%m-%d %H:%M:%S')}
         
         self._send_email(manager.email, subject, body)
 
+    def send_staff_notification_batch(self, staff: Employee, alerts: List[Alert]):
+        """Send one notification listing all new alerts assigned to a staff member"""
+        
+        if len(alerts) == 1:
+            self.send_staff_notification(staff, alerts[0])
+            return
+        
+        subject = f"📢 ShelfCam Alerts: {len(alerts)} new alerts assigned to you"
+        
+        details = '\n\n'.join(
+            f"⚠️  [{alert.priority.value.upper()}] {alert.title}\n"
+            f"    🏪 Location: {alert.shelf_name} - {alert.rack_name}\n"
+            f"    💬 {alert.message}"
+            for alert in alerts
+        )
+        
+        body = self._staff_email_body(
+            staff, alerts, f"{len(alerts)} new alerts have been assigned to you:", details
+        )
+        
+        self._send_email(staff.email, subject, body)
+    
+    def _staff_email_body(self, staff: Employee, alerts: List[Alert], intro: str, details: str) -> str:
+        """Staff email around the given alert details, worded for one or several alerts"""
+        
+        several = len(alerts) > 1
+        return f"""
+Dear {staff.username},
+
+{intro}
+
+{_section('🏷️  Alert Details')}
+
+{details}
+
+{_section('📝 Action Required')}
+
+Please visit the {'locations' if several else 'location'} and take appropriate action:
+• For stock alerts: Restock the item as needed
+• For misplacement alerts: Reorganize items to correct positions
+
+Don't forget to acknowledge {'these alerts' if several else 'this alert'} in your ShelfCam dashboard once resolved.
+
+Best regards,
+ShelfCam Alert System
+Generated at: {max(alert.created_at for alert in alerts).strftime('%Y-%m-%d %H:%M:%S')}
+        """
+
     def send_bulk_notifications(self, alerts: List[Alert]):
-        """Send notifications for multiple alerts"""
+        """Send notifications for multiple alerts, one email per staff member"""
+        
+        # Group alerts by assigned staff so each person gets a single email
+        staff_alerts: Dict[str, Tuple[Employee, List[Alert]]] = {}
+        for alert in alerts:
+            if alert.assigned_staff:
+                staff = alert.assigned_staff
+                staff_alerts.setdefault(staff.employee_id, (staff, []))[1].append(alert)
+        
+        for staff, assigned_alerts in staff_alerts.values():
+            try:
+                self.send_staff_notification_batch(staff, assigned_alerts)
+            except Exception as e:
+                logger.error(f"Failed to send notifications to staff {staff.employee_id}: {str(e)}")
+        
         for alert in alerts:
             try:
-                # Send to assigned staff
-                if alert.assigned_staff:
-                    self.send_staff_notification(alert.assigned_staff, alert)
-                
                 # Send to store manager (get from shelf assignment)
                 if hasattr(alert, 'shelf') and alert.shelf and alert.shelf.assigned_staff:
                     # Assuming manager is identified by role or specific field
@@ -138,15 +177,14 @@ Generated at: {alert.created_at.strftime('%Y-%m-%d %H:%M:%S')}
         alert_stats = self._get_alert_statistics(store_id, start_date, end_date)
         
         subject = f"📊 ShelfCam Weekly Alert Summary - Store {store_id}"
+        statistics_title = f"📊 Alert Statistics ({start_date.strftime('%Y-%m-%d')} to {end_date.strftime('%Y-%m-%d')})"
         
         body = f"""
 Dear Store Manager,
 
 Here's your {period_days}-day alert summary:
 
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-📊 Alert Statistics ({start_date.strftime('%Y-%m-%d')} to {end_date.strftime('%Y-%m-%d')})
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+{_section(statistics_title)}
 
 🔢 Total Alerts: {alert_stats['total_alerts']}
 ✅ Resolved: {alert_stats['resolved_alerts']}
@@ -154,15 +192,11 @@ Here's your {period_days}-day alert summary:
 🚨 Critical: {alert_stats['critical_alerts']}
 🔴 High Priority: {alert_stats['high_priority_alerts']}
 
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-📈 Alert Types Breakdown
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+{_section('📈 Alert Types Breakdown')}
 
 {self._format_alert_types_breakdown(alert_stats['alert_types'])}
 
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-👥 Staff Performance
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+{_section('👥 Staff Performance')}
 
 {self._format_staff_performance(alert_stats['staff_performance'])}
 
@@ -278,12 +312,7 @@ ShelfCam Analytics System
         
         formatted_types = []
         for alert_type, count in alert_types:
-            emoji = {
-                'low_stock': '📦',
-                'out_of_stock': '🚫',
-                'misplaced_item': '🔄',
-                'expired_product': '⏰'
-            }.get(alert_type.value, '📋')
+            emoji = ALERT_TYPE_EMOJI.get(alert_type.value, '📋')
             
             formatted_types.append(f"{emoji} {alert_type.value.replace('_', ' ').title()}: {count}")
         
@@ -1,12 +1,17 @@
 # app/services/websocket_service.py
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 from fastapi import WebSocket
 from app.models.alert import Alert
-import json
+from datetime import datetime
+import asyncio
+import orjson
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Sends started per event-loop turn when broadcasting to many connections
+SEND_BATCH_SIZE = 50
+
 class WebSocketService:
     def __init__(self):
         self.active_connections: Dict[int, List[WebSocket]] = {}
@@ -33,25 +38,10 @@ class WebSocketService:
         if user_id in self.active_connections:
             message = {
                 "type": "new_alert",
-                "data": {
-                    "id": alert.id,
-                    "alert_type": alert.alert_type.value,
-                    "priority": alert.priority.value,
-                    "title": alert.title,
-                    "message": alert.message,
-                    "shelf_name": alert.shelf_name,
-                    "rack_name": alert.rack_name,
-                    "product_name": alert.product_name,
-                    "created_at": alert.created_at.isoformat()
-                }
+                "data": self._alert_data(alert)
             }
             
-            for websocket in self.active_connections[user_id][:]:  # Copy list to avoid modification during iteration
-                try:
-                    await websocket.send_text(json.dumps(message))
-                except Exception as e:
-                    logger.error(f"Error sending alert to user {user_id}: {e}")
-                    self.active_connections[user_id].remove(websocket)
+            await self._broadcast(message, [user_id])
     
     async def send_alert_update(self, alert: Alert):
         """Send alert update to all connected users"""
@@ -65,13 +55,7 @@ class WebSocketService:
             }
         }
         
-        for user_id, websockets in self.active_connections.items():
-            for websocket in websockets[:]:
-                try:
-                    await websocket.send_text(json.dumps(message))
-                except Exception as e:
-                    logger.error(f"Error sending alert update to user {user_id}: {e}")
-                    websockets.remove(websocket)
+        await self._broadcast(message)
     
     async def broadcast_system_message(self, message: str):
         """Broadcast system message to all connected users"""
@@ -83,10 +67,53 @@ class WebSocketService:
             }
         }
         
-        for user_id, websockets in self.active_connections.items():
-            for websocket in websockets[:]:
-                try:
-                    await websocket.send_text(json.dumps(broadcast_message))
-                except Exception as e:
-                    logger.error(f"Error broadcasting to user {user_id}: {e}")
+        await self._broadcast(broadcast_message)
+    
+    def _alert_data(self, alert: Alert) -> dict:
+        """Fields of a new alert sent to clients"""
+        return {
+            "id": alert.id,
+            "alert_type": alert.alert_type.value,
+            "priority": alert.priority.value,
+            "title": alert.title,
+            "message": alert.message,
+            "shelf_name": alert.shelf_name,
+            "rack_name": alert.rack_name,
+            "product_name": alert.product_name,
+            "created_at": alert.created_at.isoformat()
+        }
+    
+    async def _broadcast(self, message: dict, user_ids: Optional[Iterable[int]] = None):
+        """Encode a message once and send it to the given users (all users if None)"""
+        payload = orjson.dumps(message).decode()
+        targets = list(self.active_connections) if user_ids is None else user_ids
+        
+        # Copy each list to avoid modification while sends are in flight
+        recipients = [
+            (user_id, websocket, payload)
+            for user_id in targets
+            for websocket in self.active_connections.get(user_id, [])[:]
+        ]
+        
+        await self._send(recipients, message["type"])
+    
+    async def _send(self, recipients: List[Tuple[int, WebSocket, str]], message_type: str):
+        """Send encoded payloads to (user_id, websocket, payload) recipients, dropping failed sockets"""
+        
+        # Overlap the sends on the event loop instead of awaiting them one by one,
+        # in batches so a large broadcast yields to other requests between them
+        results = []
+        for start in range(0, len(recipients), SEND_BATCH_SIZE):
+            if start:
+                await asyncio.sleep(0)
+            results.extend(await asyncio.gather(
+                *(websocket.send_text(payload) for _, websocket, payload in recipients[start:start + SEND_BATCH_SIZE]),
+                return_exceptions=True
+            ))
+        
+        for (user_id, websocket, _), result in zip(recipients, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error sending {message_type} to user {user_id}: {result}")
+                websockets = self.active_connections.get(user_id)
+                if websockets and websocket in websockets:
                     websockets.remove(websocket)
\ No newline at end of file